@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+
+from argparse import ArgumentParser, Namespace
+from contextlib import contextmanager, suppress
+from glob import glob
+from importlib.util import module_from_spec, spec_from_file_location
+from itertools import cycle
+from json import dump, dumps, load
+from os import environ, getuid, remove
+from os.path import dirname, join, realpath
+from platform import platform, python_version
+from statistics import median
+from subprocess import DEVNULL, run
+from sys import stdout
+from tempfile import TemporaryDirectory
+from time import monotonic, sleep
+from timeit import Timer
+from types import ModuleType, SimpleNamespace
+from typing import Any, Callable, Iterator, Mapping, Sequence
+
+_TOP = dirname(dirname(realpath(__file__)))
+_SCRIPT = join(_TOP, "status-line.py")
+_TMUX_PS = join(_TOP, "bin", "tmux-ps")
+_FIXTURE = join(dirname(realpath(__file__)), "fixture.json")
+_ARGS = (
+    "--lo=0.4",
+    "--hi=0.8",
+    "--interval=0.5",
+    "--colour-lo=lo",
+    "--colour-md=md",
+    "--colour-hi=hi",
+    "--colour-tr=tr",
+)
+_PROBES: Mapping[str, Sequence[Mapping[str, Any]]] = {
+    "cpu_times": ({}, {"percpu": True}),
+    "disk_io_counters": ({}, {"perdisk": True}),
+    "net_io_counters": ({}, {"pernic": True}),
+    "sensors_battery": ({},),
+    "swap_memory": ({},),
+    "virtual_memory": ({},),
+}
+
+
+def _encode(thing: Any) -> Any:
+    if hasattr(thing, "_asdict"):
+        return {"__tuple__": {k: _encode(v) for k, v in thing._asdict().items()}}
+    elif isinstance(thing, Mapping):
+        return {k: _encode(v) for k, v in thing.items()}
+    elif isinstance(thing, (list, tuple)):
+        return [_encode(v) for v in thing]
+    else:
+        return thing
+
+
+def _decode(thing: Any) -> Any:
+    if isinstance(thing, Mapping) and "__tuple__" in thing:
+        return SimpleNamespace(**{k: _decode(v) for k, v in thing["__tuple__"].items()})
+    elif isinstance(thing, Mapping):
+        return {k: _decode(v) for k, v in thing.items()}
+    elif isinstance(thing, list):
+        return [_decode(v) for v in thing]
+    else:
+        return thing
+
+
+def _key(kwargs: Mapping[str, Any]) -> str:
+    return dumps(kwargs, sort_keys=True)
+
+
+def _record(samples: int, interval: float) -> None:
+    import psutil
+
+    recorded: list[Mapping[str, Mapping[str, Any]]] = []
+    for _ in range(samples):
+        recorded.append(
+            {
+                name: {
+                    _key(kwargs): _encode(getattr(psutil, name)(**kwargs))
+                    for kwargs in calls
+                }
+                for name, calls in _PROBES.items()
+            }
+        )
+        sleep(interval)
+
+    with open(_FIXTURE, "w") as fd:
+        dump(recorded, fd, indent=2)
+        fd.write("\n")
+
+
+def _replay(module: ModuleType) -> None:
+    import psutil
+
+    with open(_FIXTURE) as fd:
+        samples = _decode(load(fd))
+
+    def fake(name: str) -> Callable[..., Any]:
+        recorded = cycle(sample[name] for sample in samples)
+
+        def probe(**kwargs: Any) -> Any:
+            return next(recorded)[_key(kwargs)]
+
+        return probe
+
+    for name in _PROBES:
+        setattr(psutil, name, fake(name))
+
+    backend = module._Psutil()
+    setattr(module, "_backend", lambda: backend)
+
+
+def _reap(tmp: str) -> None:
+    from psutil import NoSuchProcess, TimeoutExpired, process_iter
+
+    for proc in process_iter(("cmdline", "environ")):
+        cmdline, env = proc.info["cmdline"] or (), proc.info["environ"] or {}
+        if "--daemon" in cmdline and env.get("TMPDIR") == tmp:
+            with suppress(NoSuchProcess):
+                proc.terminate()
+                try:
+                    proc.wait(timeout=1)
+                except TimeoutExpired:
+                    proc.kill()
+
+
+@contextmanager
+def _scratch() -> Iterator[Mapping[str, str]]:
+    with TemporaryDirectory() as tmp:
+        mux = join(tmp, "bench")
+        env = {
+            k: v
+            for k, v in environ.items()
+            if k not in {"SSH_CLIENT", "SSH_CONNECTION"}
+        }
+        env.update(TMPDIR=tmp, TMUX=f"{mux},0,0")
+        try:
+            yield env
+        finally:
+            _reap(tmp)
+            name = f"{getuid()}{tmp.replace('/', '|')}"
+            for path in glob(join("/dev/shm", "tmux-status-line", f"{name}.*")):
+                remove(path)
+
+
+def _load(env: Mapping[str, str]) -> ModuleType:
+    environ.update(env)
+    spec = spec_from_file_location("status_line", _SCRIPT)
+    assert spec and spec.loader
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _replay(module)
+    return module
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> Mapping[str, float]:
+    timer = Timer(fn)
+    number, _ = timer.autorange()
+    runs = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {"median_us": median(runs), "min_us": min(runs), "loops": number}
+
+
+def _stages(sl: ModuleType, repeat: int) -> Mapping[str, Mapping[str, float]]:
+    args = sl._parse_args(_ARGS)
+    colours = sl._Colours(
+        lo=args.colour_lo, md=args.colour_md, hi=args.colour_hi, tr=args.colour_tr
+    )
+    sampling = args._replace(percore=32, nic_exclude="lo*", perdisk=True, swap=True)
+    s1 = sl._snap(sampling)
+    s2 = sl._snap(sampling)._replace(time=s1.time + 1)
+    cores = tuple(i / 64 for i in range(64))
+    sl._save(sampling, prev=s1, cur=s2)
+    stats = sl._measure(s1, s2, mem=sl._mem())
+    tick = sl._Tick(ssh=None, stats=stats, battery=sl._battery())
+
+    def backend(b: Any) -> Callable[[], Any]:
+        return lambda: (b.cpu(percore=True), b.disks(), b.nics(), b.mem(), b.battery())
+
+    stages: dict[str, Callable[[], Any]] = {
+        "_Psutil": backend(sl._backend()),
+    }
+    if sl._LINUX:
+        stages["_Procfs"] = backend(sl._Procfs())
+        table = sl._ProcTable(hz=100)
+        table.sample()
+        stages["_ProcTable"] = table.sample
+    stages |= {
+        "_snap": lambda: sl._snap(sampling),
+        "_load": lambda: sl._load(sampling),
+        "_save": lambda: sl._save(sampling, prev=s1, cur=s2),
+        "_measure": lambda: sl._measure(s1, s2, mem=sl._Memory(used=0.5)),
+        "_human_readable_size": lambda: sl._human_readable_size(123456789, 0),
+        "_colour": lambda: sl._colour(0.4, 0.8, 0.5, " λ 50% ", colours),
+        "_heat": lambda: sl._heat(0.4, 0.8, cores, width=32, colours=colours),
+        "_stat_lines": lambda: sl._render(args, tick=tick),
+    }
+    return {name: _time(fn, repeat=repeat) for name, fn in stages.items()}
+
+
+def _end_to_end(env: Mapping[str, str], runs: int) -> Mapping[str, float]:
+    argv = (_TMUX_PS, *_ARGS)
+    run(argv, env=env, stdout=DEVNULL, check=True)
+    sleep(1)
+
+    latencies = []
+    for _ in range(runs):
+        start = monotonic()
+        run(argv, env=env, stdout=DEVNULL, check=True)
+        latencies.append((monotonic() - start) * 1000)
+    return {
+        "median_ms": median(latencies),
+        "max_ms": max(latencies),
+        "runs": runs,
+    }
+
+
+def _parse_args() -> Namespace:
+    parser = ArgumentParser()
+    parser.add_argument("--record", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--output", default="-")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    if args.record:
+        _record(samples=2, interval=1)
+        return
+
+    with _scratch() as env:
+        sl = _load(env)
+        results = {
+            "python": python_version(),
+            "platform": platform(),
+            "stages": _stages(sl, repeat=args.repeat),
+            "tmux-ps": _end_to_end(env, runs=args.runs),
+        }
+
+    if args.output == "-":
+        dump(results, stdout, indent=2)
+        stdout.write("\n")
+    else:
+        with open(args.output, "w") as fd:
+            dump(results, fd, indent=2)
+            fd.write("\n")
+
+
+main()
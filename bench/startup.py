@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+from argparse import ArgumentParser, Namespace
+from contextlib import contextmanager
+from glob import glob
+from os import environ, getuid, read, remove
+from os.path import dirname, join, realpath
+from statistics import median
+from subprocess import PIPE, Popen, run
+from sys import executable, exit, stderr
+from tempfile import TemporaryDirectory
+from time import monotonic, sleep
+from typing import Iterator, Mapping, Sequence
+
+_TOP = dirname(dirname(realpath(__file__)))
+_SCRIPT = join(_TOP, "status-line.py")
+_ARGS = (
+    "--instant",
+    "--lo=0.4",
+    "--hi=0.8",
+    "--interval=0.5",
+    "--colour-lo=lo",
+    "--colour-md=md",
+    "--colour-hi=hi",
+    "--colour-tr=tr",
+)
+_COLD = 0.1
+
+
+@contextmanager
+def _scratch() -> Iterator[Mapping[str, str]]:
+    with TemporaryDirectory() as tmp:
+        mux = join(tmp, "bench")
+        env = {
+            k: v
+            for k, v in environ.items()
+            if k not in {"SSH_CLIENT", "SSH_CONNECTION"}
+        }
+        env.update(TMPDIR=tmp, TMUX=f"{mux},0,0")
+        try:
+            yield env
+        finally:
+            name = f"{getuid()}{tmp.replace('/', '|')}"
+            for path in glob(join("/dev/shm", "tmux-status-line", f"{name}.*")):
+                remove(path)
+
+
+def _first_byte(argv: Sequence[str], env: Mapping[str, str]) -> float:
+    start = monotonic()
+    with Popen(argv, env=env, stdout=PIPE) as proc:
+        assert proc.stdout
+        read(proc.stdout.fileno(), 1)
+        elapsed = monotonic() - start
+        proc.stdout.read()
+    return elapsed
+
+
+def _import_ms(argv: Sequence[str], env: Mapping[str, str]) -> Mapping[str, float]:
+    proc = run((executable, "-X", "importtime", *argv), env=env, capture_output=True)
+    imports: dict[str, float] = {}
+    for line in proc.stderr.decode().splitlines():
+        _, _, cols = line.partition("import time:")
+        self_us, _, rest = cols.partition("|")
+        _, _, name = rest.partition("|")
+        if self_us.strip().isdigit():
+            imports[name.strip()] = int(self_us) / 1000
+    return imports
+
+
+def _parse_args() -> Namespace:
+    parser = ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--import-budget", type=float, default=30)
+    parser.add_argument("--first-byte-budget", type=float, default=60)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    floor_argv = (executable, "-c", "print()")
+    script_argv = (executable, _SCRIPT, *_ARGS)
+
+    with _scratch() as env:
+        _first_byte(script_argv, env=env)
+
+        floors, runs = [], []
+        for _ in range(args.runs):
+            sleep(_COLD)
+            floors.append(_first_byte(floor_argv, env=env))
+            runs.append(_first_byte(script_argv, env=env))
+
+        base = _import_ms(("-c", "pass"), env=env)
+        sleep(_COLD)
+        imports = {
+            name: ms
+            for name, ms in _import_ms((_SCRIPT, *_ARGS), env=env).items()
+            if name not in base
+        }
+
+    import_ms = sum(imports.values())
+    first_byte_ms = (median(runs) - median(floors)) * 1000
+    heaviest = sorted(imports.items(), key=lambda kv: kv[1], reverse=True)[:10]
+
+    print(f"imports:    {import_ms:7.1f}ms (budget {args.import_budget}ms)")
+    print(f"first byte: {first_byte_ms:7.1f}ms (budget {args.first_byte_budget}ms)")
+    for name, ms in heaviest:
+        print(f"  {ms:7.1f}ms {name}")
+
+    if import_ms > args.import_budget or first_byte_ms > args.first_byte_budget:
+        print("startup budget exceeded", file=stderr)
+        exit(1)
+
+
+main()
@@ -1,53 +1,88 @@
 #!/usr/bin/env python3
 
-from argparse import ArgumentParser, Namespace
-from dataclasses import asdict, dataclass
-from functools import cache, partial
-from itertools import chain, count, repeat
-from json import dumps, loads
-from json.decoder import JSONDecodeError
-from locale import str as format_float
-from math import inf, isfinite
+from array import array
+from collections import deque
+from contextlib import suppress
+from fcntl import LOCK_EX, LOCK_NB, LOCK_SH, LOCK_UN, flock
+from functools import cache, lru_cache, partial
+from itertools import chain, count, groupby, pairwise, repeat
+from math import exp, inf, isfinite, log, log10, nan
+from mmap import mmap
 from operator import pow
-from os import environ, sep
-from pathlib import Path
-from platform import system
-from subprocess import DEVNULL, CalledProcessError, TimeoutExpired, check_call
-from sys import stdout
-from tempfile import NamedTemporaryFile, gettempdir
+from os import (
+    O_CREAT,
+    O_RDWR,
+    close,
+    environ,
+    fstat,
+    ftruncate,
+    getuid,
+    listdir,
+    makedirs,
+    sep,
+    statvfs,
+    sysconf,
+    unlink,
+)
+from os import open as os_open
+from os.path import dirname, isdir, isfile, ismount, join, realpath
+from struct import Struct, pack, unpack_from
+from sys import argv, platform, stdout
+from threading import Event, Lock, Thread
 from time import monotonic, sleep, time
-from typing import Iterator, Mapping
-
-from psutil import (
-    cpu_times,
-    disk_io_counters,
-    net_io_counters,
-    sensors_battery,
-    virtual_memory,
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Sequence,
+    TypeVar,
 )
+from zlib import crc32
+
+if TYPE_CHECKING:
+    from socket import socket
 
 
-@dataclass(frozen=True)
-class _Colours:
+class _Colours(NamedTuple):
     lo: str
     md: str
     hi: str
     tr: str
 
 
-@dataclass(frozen=True)
-class _Snapshot:
+class _DiskIO(NamedTuple):
+    read_bytes: int = 0
+    write_bytes: int = 0
+    read_count: int = 0
+    write_count: int = 0
+    read_time: int = 0
+    write_time: int = 0
+    busy_time: int = 0
+
+
+class _Snapshot(NamedTuple):
     time: float
     cpu_times: Mapping[str, float]
-    disk_read: int
-    disk_write: int
+    disk: _DiskIO
     net_sent: int
     net_recv: int
+    cores: Sequence[tuple[float, float]] = ()
+    nics: Mapping[str, tuple[int, int]] = {}
+    disks: Mapping[str, _DiskIO] = {}
+    swap_in: int = 0
+    swap_out: int = 0
 
 
-@dataclass(frozen=True)
-class _Stats:
-    cpu: float
+class _Record(NamedTuple):
+    time: float
+    cpu_busy: float
+    cpu_total: float
     mem: float
     disk_read: float
     disk_write: float
@@ -55,18 +90,366 @@ class _Stats:
     net_recv: float
 
 
+class _IOStats(NamedTuple):
+    reads: float = 0
+    writes: float = 0
+    wait: float = 0
+    util: float = 0
+
+
+class _Stats(NamedTuple):
+    cpu: float
+    mem: float | None
+    disk_read: float
+    disk_write: float
+    net_sent: float
+    net_recv: float
+    cores: Sequence[float] = ()
+    nics: Mapping[str, tuple[float, float]] = {}
+    disks: Mapping[str, tuple[float, float]] = {}
+    io: _IOStats = _IOStats()
+    disks_io: Mapping[str, _IOStats] = {}
+    steal: float = 0
+    iowait: float = 0
+    swap: float = 0
+    swap_in: float = 0
+    swap_out: float = 0
+    dirty: float = 0
+    writeback: float = 0
+
+
+class _Memory(NamedTuple):
+    used: float
+    swap: float = 0
+    dirty: float = 0
+    writeback: float = 0
+
+
+class _Rates(NamedTuple):
+    cpu: float
+    disk_read: float
+    disk_write: float
+    net_sent: float
+    net_recv: float
+
+
+class _Latency(NamedTuple):
+    rtt: float
+    jitter: float
+    loss: float
+
+
+class _Proc(NamedTuple):
+    pid: int
+    name: str
+    share: float
+
+
+class _Top(NamedTuple):
+    cpu: _Proc | None
+    rss: _Proc | None
+
+
+class _Stall(NamedTuple):
+    some: float
+    full: float
+
+
+class _Space(NamedTuple):
+    free: float
+    used: float
+    inodes: float
+
+
+class _TcpInfo(NamedTuple):
+    rtt: float
+    rttvar: float
+    retrans: int
+    segs_out: int
+
+
+class _Args(NamedTuple):
+    lo: float
+    hi: float
+    interval: float
+    colour_lo: str
+    colour_md: str
+    colour_hi: str
+    colour_tr: str
+    spark: int = 0
+    percore: int = 0
+    nic_include: str = ""
+    nic_exclude: str = ""
+    nic_top: int = 0
+    perdisk: bool = False
+    disk_include: str = ""
+    disk_exclude: str = ""
+    disk_top: int = 0
+    half_life: float = 10
+    cpu_rate: str = "now"
+    net_rate: str = "now"
+    disk_rate: str = "now"
+    pane_pid: int = 0
+    steal_lo: float = 0.05
+    steal_hi: float = 0.2
+    iowait: bool = False
+    swap: bool = False
+    dirty: bool = False
+    mounts: str = ""
+    pane_path: str = ""
+    fs_ttl: float = 30
+    segments: str = "ssh,net,disk,cpu,mem,battery"
+    refresh: str = ""
+    timeout: str = ""
+    instant: bool = False
+    daemon: bool = False
+
+
+class _Tick(NamedTuple):
+    ssh: _Latency | None
+    stats: _Stats | None
+    battery: int | None
+    sparks: Mapping[str, str] = {}
+    smoothed: Mapping[str, _Rates] = {}
+    top: _Top | None = None
+    pressure: Mapping[str, _Stall] = {}
+    pane_pressure: Mapping[str, _Stall] = {}
+    filesystems: Mapping[str, _Space] = {}
+
+
+_Render = Callable[[_Args, _Colours, _Tick], Iterable[str]]
+
+
+class _Segment(NamedTuple):
+    probes: frozenset[str]
+    render: _Render
+
+
+_LINUX = platform.startswith("linux")
+
+_T = TypeVar("_T")
+_U = TypeVar("_U")
+_C = TypeVar("_C", bound=tuple[int, ...])
+
+_IDLE = 30
+_COLD = 0.1
+_GRACE = 0.2
+_WINDOW = 10
+_POLL = 0.01
+_LOST = _Latency(rtt=inf, jitter=0, loss=1)
+
+_NETLINK_SOCK_DIAG = 4
+_SOCK_DIAG_BY_FAMILY = 20
+_NLM_F_REQUEST = 1
+_INET_DIAG_INFO = 2
+_INET_DIAG_NOCOOKIE = 0xFFFFFFFF
+_TCP_ESTABLISHED = 1
+
+_CPU_FIELDS = (
+    "user",
+    "nice",
+    "system",
+    "idle",
+    "iowait",
+    "irq",
+    "softirq",
+    "steal",
+    "guest",
+    "guest_nice",
+    "interrupt",
+    "dpc",
+)
+_PRESSURE = {"cpu": "cpu", "memory": "mem", "io": "io"}
+_CGROUPS = ("/sys/fs/cgroup", "/sys/fs/cgroup/unified")
+_SWEEP = 8
+_HOT = 16
+_SPINS = 64
+_SEQLOCK = Struct("=QI4x")
+_CORES = 1024
+_NICS = 64
+_DISKS = 64
+_SPACES = 16
+_SNAPSHOT = Struct(f"=d{len(_CPU_FIELDS)}d{len(_DiskIO._fields)}QQQQQIII")
+_NIC = Struct("=16sQQ")
+_DISK = Struct(f"=32s{len(_DiskIO._fields)}Q")
+_SNAPSHOT_NICS = _SNAPSHOT.size + _CORES * 2 * 8
+_SNAPSHOT_DISKS = _SNAPSHOT_NICS + _NICS * _NIC.size
+_SNAPSHOT_SIZE = _SNAPSHOT_DISKS + _DISKS * _DISK.size
+_HISTORY = 600
+_RING = Struct("=II")
+_RECORD = Struct(f"={len(_Record._fields)}d")
+_SPARKS = 120
+_BLOCKS = "▁▂▃▄▅▆▇█"
+_HORIZONS = {"ewma": 0.0, "5s": 5.0, "1m": 60.0, "5m": 300.0}
+_AVERAGES = Struct(f"=d{len(_HORIZONS) * len(_Rates._fields)}d")
+_ENTRY_POINTS = "tmux_status_line.segments"
+_SEGMENTS: dict[str, _Segment] = {}
+_SAMPLED = frozenset(("snap", "disks", "mem"))
+
+
+@cache
+def _tmpdir() -> str:
+    return next(filter(None, map(environ.get, ("TMPDIR", "TEMP", "TMP"))), "/tmp")
+
+
 @cache
-def _path() -> Path:
+def _name() -> str:
     mux, _, _ = environ["TMUX"].partition(",")
-    p = Path(gettempdir()) / "tmux-status-line" / mux.replace(sep, "|")
-    return p.with_suffix(".json")
+    return mux.replace(sep, "|")
+
+
+@cache
+def _host() -> str:
+    return f"{getuid()}{_tmpdir().replace(sep, '|')}"
+
+
+def _path(name: str, suffix: str) -> str:
+    return join(_tmpdir(), "tmux-status-line", name + suffix)
+
+
+def _shm_path(name: str, suffix: str) -> str:
+    root = "/dev/shm" if isdir("/dev/shm") else _tmpdir()
+    return join(root, "tmux-status-line", name + suffix)
+
+
+class _Shm:
+    def __init__(self, path: str, size: int, layout: str) -> None:
+        self._id = crc32(layout.encode())
+        size += _SEQLOCK.size
+        path = f"{path}.{self._id:08x}"
+
+        makedirs(dirname(path), exist_ok=True)
+        fd = os_open(path, O_RDWR | O_CREAT, 0o600)
+        try:
+            if fstat(fd).st_size < size:
+                ftruncate(fd, size)
+            self._mm = mmap(fd, size)
+        finally:
+            close(fd)
+
+        _, layout_id = _SEQLOCK.unpack_from(self._mm)
+        if layout_id != self._id:
+            self._mm[:] = bytes(size)
+            _SEQLOCK.pack_into(self._mm, 0, 0, self._id)
+
+    def read(self, start: int = 0, stop: int | None = None) -> bytes | None:
+        begin = _SEQLOCK.size + start
+        end = None if stop is None else _SEQLOCK.size + stop
+        for _ in range(_SPINS):
+            s1, _ = _SEQLOCK.unpack_from(self._mm)
+            if not s1:
+                return None
+            elif not s1 & 1:
+                data = self._mm[begin:end]
+                s2, _ = _SEQLOCK.unpack_from(self._mm)
+                if s1 == s2:
+                    return data
+            sleep(0)
+        else:
+            return None
+
+    def write(self, *chunks: tuple[int, bytes]) -> None:
+        seq, _ = _SEQLOCK.unpack_from(self._mm)
+        seq = (seq + 1) | 1
+        _SEQLOCK.pack_into(self._mm, 0, seq, self._id)
+        for offset, data in chunks:
+            begin = _SEQLOCK.size + offset
+            self._mm[begin : begin + len(data)] = data
+        _SEQLOCK.pack_into(self._mm, 0, seq + 1, self._id)
+
+
+class _Ring:
+    def __init__(self, path: str, capacity: int) -> None:
+        self._capacity = capacity
+        self._shm = _Shm(
+            path,
+            size=_RING.size + capacity * _RECORD.size,
+            layout=f"{_RING.format}{_RECORD.format}*{capacity}",
+        )
+
+    def push(self, record: _Record) -> None:
+        head, size = _RING.unpack(self._shm.read(0, _RING.size) or bytes(_RING.size))
+        data = _RECORD.pack(*record)
+        self._shm.write(
+            (_RING.size + head * _RECORD.size, data),
+            (0, _RING.pack((head + 1) % self._capacity, min(size + 1, self._capacity))),
+        )
+
+    def history(self) -> Sequence[_Record]:
+        if data := self._shm.read():
+            head, size = _RING.unpack_from(data)
+            records = tuple(
+                _Record(*fields)
+                for fields in _RECORD.iter_unpack(memoryview(data)[_RING.size :])
+            )
+            return tuple(
+                records[(head - size + i) % self._capacity] for i in range(size)
+            )
+        else:
+            return ()
+
 
+@cache
+def _store(scope: str) -> _Shm:
+    return _Shm(
+        _shm_path(scope, ".snap"),
+        size=_SNAPSHOT_SIZE * 2,
+        layout=(
+            f"({_SNAPSHOT.format}{_CORES * 2}d"
+            f"{_NIC.format}*{_NICS}{_DISK.format}*{_DISKS})*2"
+        ),
+    )
+
+
+@cache
+def _ring(scope: str) -> _Ring:
+    return _Ring(_shm_path(scope, ".ring"), capacity=_HISTORY)
+
+
+class _Averages:
+    def __init__(self, path: str) -> None:
+        self._shm = _Shm(
+            path,
+            size=_AVERAGES.size,
+            layout=f"{_AVERAGES.format}{','.join(_HORIZONS)}",
+        )
 
-def _dump(path: Path, thing: str) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with NamedTemporaryFile(dir=path.parent, mode="w", delete=False) as fd:
-        fd.write(thing)
-    Path(fd.name).replace(path)
+    def _unpack(self, data: bytes) -> Mapping[str, _Rates]:
+        _, *values = _AVERAGES.unpack(data)
+        width = len(_Rates._fields)
+        return {
+            name: _Rates(*values[i * width : (i + 1) * width])
+            for i, name in enumerate(_HORIZONS)
+        }
+
+    def read(self) -> Mapping[str, _Rates]:
+        data = self._shm.read()
+        return self._unpack(data) if data else {}
+
+    def update(self, t: float, rates: _Rates, half_life: float) -> Mapping[str, _Rates]:
+        data = self._shm.read()
+        last, *_ = _AVERAGES.unpack(data) if data else (0.0,)
+        if not data or not last:
+            averages = {name: rates for name in _HORIZONS}
+        elif t <= last:
+            return self._unpack(data)
+        else:
+            elapsed = t - last
+            averages = {}
+            for name, prev in self._unpack(data).items():
+                tau = _HORIZONS[name] or max(half_life, 1e-3) / log(2)
+                decay = exp(-elapsed / tau)
+                averages[name] = _Rates(
+                    *(p * decay + r * (1 - decay) for p, r in zip(prev, rates))
+                )
+
+        self._shm.write((0, _AVERAGES.pack(t, *chain.from_iterable(averages.values()))))
+        return averages
+
+
+@cache
+def _averages(scope: str) -> _Averages:
+    return _Averages(_shm_path(scope, ".avg"))
 
 
 def _human_readable_size(size: float, precision: int = 3) -> str:
@@ -76,186 +459,1883 @@ def _human_readable_size(size: float, precision: int = 3) -> str:
     for factor, unit in steps:
         divided = size / factor
         if abs(divided) < 1000:
-            fmt = format_float(round(divided, precision))
+            fmt = format(round(divided, precision), ".12g")
             return f"{fmt}{unit}"
     else:
         raise ValueError(f"unit over flow: {size}")
 
 
-def _ip() -> str | None:
+def _client() -> str:
     try:
-        ip = _path().with_suffix(".ip").read_text()
+        with open(_path(_name(), ".ip")) as fd:
+            return fd.read()
     except FileNotFoundError:
-        if client := environ.get("SSH_CLIENT"):
-            ip, *_ = client.split()
-            return ip
-        else:
-            return None
-    else:
-        return ip
+        return environ.get("SSH_CONNECTION") or environ.get("SSH_CLIENT", "")
 
 
-def _ssh(timeout: float) -> float | None:
-    if ip := _ip():
-        t = str(max(round(timeout), 1))
-        now = monotonic()
+def _checksum(packet: bytes) -> int:
+    padded = packet + b"\0" * (len(packet) % 2)
+    total: int = sum(unpack_from(f"!{len(padded) // 2}H", padded))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+class _Prober:
+    def __init__(self, ip: str, port: int) -> None:
+        from socket import AF_INET, AF_INET6, IPPROTO_ICMP, IPPROTO_ICMPV6, SOCK_DGRAM
+        from socket import socket
+
+        self._addr = (ip, port)
+        self._family = AF_INET6 if ":" in ip else AF_INET
+        self._seq = count(1)
+        self._window: deque[float] = deque(maxlen=_WINDOW)
+        self._icmp: "socket | None" = None
+        proto = IPPROTO_ICMPV6 if self._family == AF_INET6 else IPPROTO_ICMP
+        with suppress(OSError):
+            icmp = socket(self._family, SOCK_DGRAM, proto)
+            try:
+                icmp.connect((ip, 0))
+            except OSError:
+                icmp.close()
+                raise
+            self._icmp = icmp
+
+    def _echo(self, icmp: "socket", timeout: float) -> float:
+        from socket import AF_INET6
+
+        v6 = self._family == AF_INET6
+        seq = next(self._seq) & 0xFFFF
+        kind, reply = (128, 129) if v6 else (8, 0)
+        packet = pack("!BBHHH", kind, 0, 0, 0, seq)
+        if not v6:
+            packet = pack("!BBHHH", kind, 0, _checksum(packet), 0, seq)
+
+        start = monotonic()
+        deadline = start + timeout
+        icmp.send(packet)
+        while (remaining := deadline - monotonic()) > 0:
+            icmp.settimeout(remaining)
+            data = icmp.recv(64)
+            if len(data) >= 8:
+                got, _, _, _, ack = unpack_from("!BBHHH", data)
+                if got == reply and ack == seq:
+                    return monotonic() - start
+        return inf
+
+    def _connect(self, timeout: float) -> float:
+        from socket import SOCK_STREAM, socket
+
+        with socket(self._family, SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            start = monotonic()
+            try:
+                sock.connect(self._addr)
+            except ConnectionRefusedError:
+                pass
+            return monotonic() - start
+
+    def probe(self, timeout: float) -> _Latency:
         try:
-            check_call(
-                ("ping", "-n", "-c", "1", "-w", t, "-q", "--", ip),
-                stdout=DEVNULL,
-                timeout=timeout,
+            rtt = (
+                self._echo(self._icmp, timeout=timeout)
+                if self._icmp
+                else self._connect(timeout=timeout)
+            )
+        except OSError:
+            rtt = inf
+        self._window.append(rtt)
+
+        rtts = tuple(filter(isfinite, self._window))
+        diffs = tuple(abs(b - a) for a, b in pairwise(rtts))
+        latency = _Latency(
+            rtt=rtt,
+            jitter=sum(diffs) / len(diffs) if diffs else 0,
+            loss=1 - len(rtts) / len(self._window),
+        )
+        return latency
+
+
+@cache
+def _prober(ip: str, port: int) -> _Prober:
+    return _Prober(ip, port=port)
+
+
+class _Diag:
+    def __init__(self) -> None:
+        from socket import AF_NETLINK, SOCK_RAW, socket
+
+        self._sock = socket(AF_NETLINK, SOCK_RAW, _NETLINK_SOCK_DIAG)
+        self._seq = count(1)
+        self._lock = Lock()
+
+    def query(self, req: bytes) -> bytes | None:
+        with self._lock:
+            seq = next(self._seq) & 0xFFFFFFFF
+            msg = pack(
+                "=IHHII", 16 + len(req), _SOCK_DIAG_BY_FAMILY, _NLM_F_REQUEST, seq, 0
+            )
+            deadline = monotonic() + _GRACE
+            self._sock.send(msg + req)
+            while (remaining := deadline - monotonic()) > 0:
+                self._sock.settimeout(remaining)
+                data = self._sock.recv(65536)
+                if len(data) >= 16:
+                    _, kind, _, ack = unpack_from("=IHHI", data)
+                    if ack == seq:
+                        return data if kind == _SOCK_DIAG_BY_FAMILY else None
+            return None
+
+
+@cache
+def _diag() -> _Diag:
+    return _Diag()
+
+
+def _addr(family: int, ip: str) -> bytes:
+    from socket import AF_INET6, inet_pton
+
+    if family == AF_INET6 and ":" not in ip:
+        ip = f"::ffff:{ip}"
+    return inet_pton(family, ip).ljust(16, b"\0")
+
+
+def _tcp_info(
+    family: int, src: str, sport: int, dst: str, dport: int
+) -> _TcpInfo | None:
+    from socket import IPPROTO_TCP
+
+    sockid = pack(
+        "!HH16s16s", sport, dport, _addr(family, src), _addr(family, dst)
+    ) + pack("=III", 0, _INET_DIAG_NOCOOKIE, _INET_DIAG_NOCOOKIE)
+    req = (
+        pack(
+            "=BBBBI",
+            family,
+            IPPROTO_TCP,
+            1 << (_INET_DIAG_INFO - 1),
+            0,
+            1 << _TCP_ESTABLISHED,
+        )
+        + sockid
+    )
+    data = _diag().query(req)
+    if not data or data[20:56] != sockid[:36]:
+        return None
+
+    (length,) = unpack_from("=I", data)
+    offset = 16 + 72
+    while offset + 4 <= min(length, len(data)):
+        rta_len, rta_type = unpack_from("=HH", data, offset)
+        if rta_len < 4:
+            break
+        elif rta_type == _INET_DIAG_INFO:
+            info = data[offset + 4 : offset + rta_len]
+            rtt, rttvar = unpack_from("=II", info, 68)
+            (retrans,) = unpack_from("=I", info, 100)
+            (segs_out,) = unpack_from("=I", info, 136) if len(info) >= 140 else (0,)
+            return _TcpInfo(
+                rtt=rtt / 1e6, rttvar=rttvar / 1e6, retrans=retrans, segs_out=segs_out
             )
-        except (CalledProcessError, TimeoutExpired):
-            return inf
         else:
-            return monotonic() - now
+            offset += (rta_len + 3) & ~3
+    return None
+
+
+@cache
+def _retransmits(conn: tuple[str, ...]) -> deque[_TcpInfo]:
+    return deque(maxlen=_WINDOW)
+
+
+def _passive(
+    client_ip: str, client_port: str, server_ip: str, server_port: str
+) -> _Latency | None:
+    from socket import AF_INET, AF_INET6
+
+    for family in (AF_INET, AF_INET6) if ":" not in client_ip else (AF_INET6,):
+        if info := _tcp_info(
+            family,
+            src=server_ip,
+            sport=int(server_port),
+            dst=client_ip,
+            dport=int(client_port),
+        ):
+            window = _retransmits((client_ip, client_port, server_ip, server_port))
+            window.append(info)
+            first = window[0]
+            sent = info.segs_out - first.segs_out
+            loss = (info.retrans - first.retrans) / sent if sent > 0 else 0
+            return _Latency(rtt=info.rtt, jitter=info.rttvar, loss=min(1, loss))
     else:
         return None
 
 
-def _load() -> _Snapshot | None:
-    try:
-        raw = _path().read_text()
-        json = loads(raw)
-        snapshot = _Snapshot(**json)
-    except (FileNotFoundError, JSONDecodeError):
-        _path().unlink(missing_ok=True)
-        return None
+def _ssh(peer: str, timeout: float) -> _Latency | None:
+    client = peer.split()
+    if len(client) >= 4 and _LINUX:
+        client_ip, client_port, server_ip, server_port, *_ = client
+        with suppress(OSError, ValueError):
+            if latency := _passive(client_ip, client_port, server_ip, server_port):
+                return latency
+
+    if client:
+        ip, *rest = client
+        port = next(iter(rest), "22")
+        return _prober(ip, port=int(port)).probe(timeout) if port.isdigit() else None
     else:
-        return snapshot
+        return None
 
 
-def _snap() -> _Snapshot:
-    t = time()
-    cpu = cpu_times()
-    disk = disk_io_counters()
-    net = net_io_counters()
-    snapshot = _Snapshot(
+def _unpack(data: bytes, base: int) -> _Snapshot | None:
+    t, *rest = _SNAPSHOT.unpack_from(data, base)
+    if not t:
+        return None
+
+    cpu, rest = rest[: len(_CPU_FIELDS)], rest[len(_CPU_FIELDS) :]
+    disk, rest = _DiskIO(*rest[: len(_DiskIO._fields)]), rest[len(_DiskIO._fields) :]
+    net_sent, net_recv, swap_in, swap_out, *counts = rest
+    ncores, nnics, ndisks = counts
+    view = memoryview(data)[base:]
+    cores = view[_SNAPSHOT.size : _SNAPSHOT_NICS].cast("d")
+    nics = _NIC.iter_unpack(view[_SNAPSHOT_NICS : _SNAPSHOT_NICS + nnics * _NIC.size])
+    disks = _DISK.iter_unpack(
+        view[_SNAPSHOT_DISKS : _SNAPSHOT_DISKS + ndisks * _DISK.size]
+    )
+    return _Snapshot(
         time=t,
-        cpu_times=cpu._asdict(),
-        disk_read=disk.read_bytes if disk else 0,
-        disk_write=disk.write_bytes if disk else 0,
-        net_sent=net.bytes_sent,
-        net_recv=net.bytes_recv,
+        cpu_times=dict(zip(_CPU_FIELDS, cpu)),
+        disk=disk,
+        net_sent=net_sent,
+        net_recv=net_recv,
+        cores=tuple(zip(cores[: ncores * 2 : 2], cores[1 : ncores * 2 : 2])),
+        nics={
+            name.rstrip(b"\0").decode(errors="ignore"): (sent, recv)
+            for name, sent, recv in nics
+        },
+        disks={
+            name.rstrip(b"\0").decode(errors="ignore"): _DiskIO(*io)
+            for name, *io in disks
+        },
+        swap_in=swap_in,
+        swap_out=swap_out,
     )
-    return snapshot
 
 
-def _states(interval: int) -> tuple[_Snapshot, _Snapshot, int | None]:
-    s1 = _load() or _snap()
-    battery = sensors_battery()
-    sleep(max(0, interval - (time() - s1.time)))
-    s2 = _snap()
+def _load(args: _Args) -> tuple[_Snapshot | None, _Snapshot | None]:
+    if data := _store(_scope(args)).read():
+        return _unpack(data, base=0), _unpack(data, base=_SNAPSHOT_SIZE)
+    else:
+        return None, None
 
-    json = dumps(asdict(s2), check_circular=False, ensure_ascii=False)
-    _dump(_path(), thing=json)
-    return s1, s2, battery.percent if battery else None
 
+def _pack(snapshot: _Snapshot, base: int) -> Iterator[tuple[int, bytes]]:
+    yield base, _SNAPSHOT.pack(
+        snapshot.time,
+        *(snapshot.cpu_times[k] for k in _CPU_FIELDS),
+        *snapshot.disk,
+        snapshot.net_sent,
+        snapshot.net_recv,
+        snapshot.swap_in,
+        snapshot.swap_out,
+        len(snapshot.cores),
+        len(snapshot.nics),
+        len(snapshot.disks),
+    )
+    yield base + _SNAPSHOT.size, array(
+        "d", chain.from_iterable(snapshot.cores)
+    ).tobytes()
+    yield base + _SNAPSHOT_NICS, b"".join(
+        _NIC.pack(name.encode(), sent, recv)
+        for name, (sent, recv) in snapshot.nics.items()
+    )
+    yield base + _SNAPSHOT_DISKS, b"".join(
+        _DISK.pack(name.encode(), *io) for name, io in snapshot.disks.items()
+    )
 
-def _cpu(delta: Mapping[str, float]) -> float:
-    tot = sum(delta.values())
-    if system() == "Linux":
-        tot -= delta.get("guest", 0)
-        tot -= delta.get("guest_nice", 0)
 
-    busy = tot
-    busy -= delta["idle"]
-    busy -= delta.get("iowait", 0)
+def _save(args: _Args, prev: _Snapshot, cur: _Snapshot) -> None:
+    _store(_scope(args)).write(*_pack(prev, base=0), *_pack(cur, base=_SNAPSHOT_SIZE))
 
-    try:
-        return busy / tot
-    except ZeroDivisionError:
-        return 0
 
+def _cpu_fields(cpu: Any) -> Mapping[str, float]:
+    return {k: getattr(cpu, k, 0.0) for k in _CPU_FIELDS}
 
-def _measure(s1: _Snapshot, s2: _Snapshot) -> _Stats:
-    time_adjust = 1 / (s2.time - s1.time)
-    cpu_delta = {
-        k: max(0, v2 - v1)
-        for (k, v1), (_, v2) in zip(s1.cpu_times.items(), s2.cpu_times.items())
-    }
-    mem = virtual_memory()
-    stats = _Stats(
-        cpu=_cpu(cpu_delta) * time_adjust,
-        mem=((mem.total - mem.available) / mem.total) * time_adjust,
-        disk_read=max(0, s2.disk_read - s1.disk_read) * time_adjust,
-        disk_write=max(0, s2.disk_write - s1.disk_write) * time_adjust,
-        net_sent=max(0, s2.net_sent - s1.net_sent) * time_adjust,
-        net_recv=max(0, s2.net_recv - s1.net_recv) * time_adjust,
-    )
-    return stats
 
+def _disk_io(disk: Any) -> _DiskIO:
+    return _DiskIO(*(getattr(disk, k, 0) for k in _DiskIO._fields))
 
-def _colour(lo: float, hi: float, val: float, text: str, colours: _Colours) -> str:
-    if val < lo:
-        return f"#[bg={colours.lo}]{text}{colours.tr}"
-    elif val < hi:
-        return f"#[bg={colours.md}]{text}{colours.tr}"
+
+def _disk_sum(disks: Iterable[_DiskIO]) -> _DiskIO:
+    return _DiskIO(*map(sum, zip(*disks)))
+
+
+def _globs(spec: str) -> Sequence[str]:
+    return tuple(glob for glob in spec.split(",") if glob)
+
+
+@lru_cache(maxsize=4)
+def _select(
+    names: frozenset[str],
+    include: str,
+    exclude: str,
+    defaults: frozenset[str] | None = None,
+) -> Sequence[str]:
+    from fnmatch import fnmatchcase
+
+    inc, exc = _globs(include), _globs(exclude)
+
+    def keep(name: str) -> bool:
+        if inc:
+            included = any(fnmatchcase(name, glob) for glob in inc)
+        else:
+            included = defaults is None or name in defaults
+        return included and not any(fnmatchcase(name, glob) for glob in exc)
+
+    return sorted(filter(keep, names))
+
+
+def _busiest_counters(
+    counters: Mapping[str, _C], names: Sequence[str], limit: int
+) -> Mapping[str, _C]:
+    from heapq import nlargest
+
+    if len(names) <= limit:
+        return {name: counters[name] for name in names}
+    busiest = nlargest(limit, names, key=lambda name: sum(counters[name][:2]))
+    return {name: counters[name] for name in busiest}
+
+
+@cache
+def _block_devices() -> frozenset[str]:
+    return frozenset(name.replace("!", "/") for name in listdir("/sys/block"))
+
+
+@cache
+def _top_level_disks() -> frozenset[str] | None:
+    if _LINUX and isdir("/sys/block"):
+        return frozenset(
+            name
+            for name in _block_devices()
+            if "/devices/virtual/"
+            not in realpath(join("/sys/block", name.replace("/", "!")))
+        )
     else:
-        return f"#[bg={colours.hi}]{text}{colours.tr}"
+        return None
 
 
-def _style(style: str, text: str) -> str:
-    return f"#[{style}]{text}#[none]"
+class _Psutil:
+    def __init__(self) -> None:
+        self._warm = False
+        self._lock = Lock()
 
+    def cpu(
+        self, percore: bool
+    ) -> tuple[Mapping[str, float], Sequence[Mapping[str, float]]]:
+        from psutil import cpu_times
 
-def _stat_lines(
-    lo: float, hi: float, interval: int, colours: _Colours
-) -> Iterator[str]:
-    ssh = _ssh(interval)
+        cores = cpu_times(percpu=True)[:_CORES] if percore else ()
+        return _cpu_fields(cpu_times()), tuple(map(_cpu_fields, cores))
 
-    s1, s2, battery = _states(interval)
-    stats = _measure(s1, s2)
+    def disk(self) -> _DiskIO:
+        from psutil import disk_io_counters
 
-    cpu = format(stats.cpu, "4.0%")
-    mem = format(stats.mem, "4.0%")
+        return _disk_io(disk_io_counters())
 
-    hr_dr = _human_readable_size(stats.disk_read, precision=0)
-    hr_dw = _human_readable_size(stats.disk_write, precision=0)
-    hr_ns = _human_readable_size(stats.net_sent, precision=0)
-    hr_nr = _human_readable_size(stats.net_recv, precision=0)
+    def disks(self) -> Mapping[str, _DiskIO]:
+        from psutil import disk_io_counters
 
-    disk_read, disk_write = f"{hr_dr}B".rjust(5), f"{hr_dw}B".rjust(5)
-    net_sent, net_recv = f"{hr_ns}B".rjust(5), f"{hr_nr}B".rjust(5)
+        return {
+            name: _disk_io(disk)
+            for name, disk in disk_io_counters(perdisk=True).items()
+        }
 
-    if ssh:
-        ping = (
-            "~ " + format(ssh * 1000, ".1f")
-            if isfinite(ssh)
-            else "> " + format(interval * 1000, ".0f")
+    def net(self) -> tuple[int, int]:
+        from psutil import net_io_counters
+
+        net = net_io_counters()
+        return net.bytes_sent, net.bytes_recv
+
+    def nics(self) -> Mapping[str, tuple[int, int]]:
+        from psutil import net_io_counters
+
+        return {
+            name: (nic.bytes_sent, nic.bytes_recv)
+            for name, nic in net_io_counters(pernic=True).items()
+        }
+
+    def mem(self) -> _Memory:
+        from psutil import swap_memory, virtual_memory
+
+        mem, swap = virtual_memory(), swap_memory()
+        return _Memory(
+            used=(mem.total - mem.available) / mem.total,
+            swap=swap.used / swap.total if swap.total else 0,
+            dirty=getattr(mem, "dirty", 0),
+            writeback=getattr(mem, "writeback", 0),
         )
-        yield f"SSH {ping}ms"
 
-    yield f"[⇡ {net_sent}, ⇣ {net_recv}]"
-    yield f"[r {disk_read}, w {disk_write}]"
-    yield _colour(lo, hi, val=stats.cpu, text=f" λ{cpu} ", colours=colours)
-    yield _colour(lo, hi, val=stats.mem, text=f" τ{mem} ", colours=colours)
+    def swaps(self) -> tuple[int, int]:
+        from psutil import swap_memory
 
-    if battery is not None:
-        yield "|"
-        yield _style("italics", text=f"{battery}%")
+        swap = swap_memory()
+        return swap.sin, swap.sout
 
+    def battery(self) -> int | None:
+        from psutil import sensors_battery
 
-def _parse_args() -> Namespace:
-    parser = ArgumentParser()
-    parser.add_argument("--lo", type=float, required=True)
-    parser.add_argument("--hi", type=float, required=True)
-    parser.add_argument("--interval", type=float, required=True)
-    parser.add_argument("--colour-lo", required=True)
-    parser.add_argument("--colour-md", required=True)
-    parser.add_argument("--colour-hi", required=True)
-    parser.add_argument("--colour-tr", required=True)
-    return parser.parse_args()
+        battery = sensors_battery()
+        return battery.percent if battery else None
 
+    def top(self) -> _Top | None:
+        from psutil import process_iter
 
-def main() -> None:
-    args = _parse_args()
-    colours = _Colours(
-        lo=args.colour_lo, md=args.colour_md, hi=args.colour_hi, tr=args.colour_tr
-    )
-    lines = _stat_lines(args.lo, args.hi, interval=args.interval, colours=colours)
-    stream = chain.from_iterable(zip(lines, repeat(" ")))
-    stdout.writelines(stream)
+        with self._lock:
+            warm, self._warm = self._warm, True
+            procs = tuple(process_iter(("name", "cpu_percent", "memory_percent")))
+            if not warm or not procs:
+                return None
+
+            cpu = max(procs, key=lambda proc: proc.info["cpu_percent"] or 0)
+            rss = max(procs, key=lambda proc: proc.info["memory_percent"] or 0)
+            return _Top(
+                cpu=_Proc(
+                    pid=cpu.pid,
+                    name=cpu.info["name"] or "",
+                    share=(cpu.info["cpu_percent"] or 0) / 100,
+                ),
+                rss=_Proc(
+                    pid=rss.pid,
+                    name=rss.info["name"] or "",
+                    share=(rss.info["memory_percent"] or 0) / 100,
+                ),
+            )
+
+
+class _File:
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb", buffering=0)
+        self._buf = bytearray(4096)
+        self._lock = Lock()
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def read(self) -> bytearray:
+        with self._lock:
+            self._file.seek(0)
+            n = 0
+            while True:
+                with memoryview(self._buf) as view:
+                    read = self._file.readinto(view[n:])
+                if not read:
+                    return self._buf[:n]
+                n += read
+                if n == len(self._buf):
+                    self._buf.extend(bytes(n))
+
+
+class _ProcTable:
+    def __init__(self, hz: int) -> None:
+        self._hz = hz
+        self._pages = sysconf("SC_PHYS_PAGES")
+        self._samples = 0
+        self._procs: dict[int, tuple[float, int, int, str, float, int]] = {}
+        self._new: set[int] = set()
+        self._lock = Lock()
+
+    def _read(self, pid: int) -> tuple[int, int, str, int] | None:
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as fd:
+                data = fd.read()
+        except OSError:
+            return None
+        head, _, tail = data.rpartition(b")")
+        fields = tail.split()
+        name = head.partition(b"(")[2].decode(errors="replace")
+        ticks, rss, start = (
+            int(fields[11]) + int(fields[12]),
+            int(fields[21]),
+            int(fields[19]),
+        )
+        return ticks, rss, name, start
+
+    def sample(self) -> _Top | None:
+        from heapq import nlargest
+
+        with self._lock:
+            procs = self._procs
+            pids = {int(name) for name in listdir("/proc") if name.isdigit()}
+            for pid in procs.keys() - pids:
+                del procs[pid]
+
+            self._samples += 1
+            sweep = self._samples % _SWEEP
+            hot = nlargest(_HOT, procs, key=lambda pid: procs[pid][4])
+            due = (
+                pids
+                if self._samples <= 2
+                else {pid for pid in pids if pid not in procs or pid % _SWEEP == sweep}
+            )
+
+            new = set()
+            for pid in due.union(hot, self._new & pids):
+                if stat := self._read(pid):
+                    now, (ticks, rss, name, start) = monotonic(), stat
+                    prev = procs.get(pid)
+                    if prev and prev[5] == start and ticks >= prev[1]:
+                        elapsed = now - prev[0]
+                        rate = (
+                            (ticks - prev[1]) / self._hz / elapsed
+                            if elapsed
+                            else prev[4]
+                        )
+                    else:
+                        new.add(pid)
+                        rate = 0
+                    procs[pid] = (now, ticks, rss, name, rate, start)
+                else:
+                    procs.pop(pid, None)
+            self._new = new
+
+            if self._samples < 2 or not procs:
+                return None
+
+            cpu = max(procs, key=lambda pid: procs[pid][4])
+            rss = max(procs, key=lambda pid: procs[pid][2])
+            return _Top(
+                cpu=_Proc(pid=cpu, name=procs[cpu][3], share=procs[cpu][4]),
+                rss=_Proc(
+                    pid=rss, name=procs[rss][3], share=procs[rss][2] / self._pages
+                ),
+            )
+
+
+class _Procfs(_Psutil):
+    def __init__(self) -> None:
+        super().__init__()
+        self._hz = sysconf("SC_CLK_TCK")
+        self._stat = _File("/proc/stat")
+        self._meminfo = _File("/proc/meminfo")
+        self._net = _File("/proc/net/dev")
+        self._diskstats = _File("/proc/diskstats")
+        self._vmstat = _File("/proc/vmstat")
+        self._page = sysconf("SC_PAGE_SIZE")
+        self._battery = self._power_supply()
+        self._procs = _ProcTable(self._hz)
+
+    def _power_supply(self) -> _File | None:
+        root = "/sys/class/power_supply"
+        for name in sorted(listdir(root)) if isdir(root) else ():
+            if name.startswith("BAT") or "battery" in name.lower():
+                with suppress(OSError):
+                    return _File(join(root, name, "capacity"))
+        return None
+
+    def cpu(
+        self, percore: bool
+    ) -> tuple[Mapping[str, float], Sequence[Mapping[str, float]]]:
+        cpus, lines = [], _CORES + 1 if percore else 1
+        for line in self._stat.read().split(b"\n", lines)[:lines]:
+            if not line.startswith(b"cpu"):
+                break
+            ticks = (int(tick) / self._hz for tick in line.split()[1:])
+            cpus.append(dict(zip(_CPU_FIELDS, chain(ticks, repeat(0.0)))))
+        return cpus[0], cpus[1:]
+
+    def disk(self) -> _DiskIO:
+        devices = _block_devices()
+        return _disk_sum(io for name, io in self.disks().items() if name in devices)
+
+    def disks(self) -> Mapping[str, _DiskIO]:
+        disks = {}
+        for line in self._diskstats.read().splitlines():
+            fields = line.split()
+            if len(fields) >= 14:
+                disks[fields[2].decode()] = _DiskIO(
+                    read_bytes=int(fields[5]) * 512,
+                    write_bytes=int(fields[9]) * 512,
+                    read_count=int(fields[3]),
+                    write_count=int(fields[7]),
+                    read_time=int(fields[6]),
+                    write_time=int(fields[10]),
+                    busy_time=int(fields[12]),
+                )
+        return disks
+
+    def net(self) -> tuple[int, int]:
+        nics = self.nics().values()
+        return sum(sent for sent, _ in nics), sum(recv for _, recv in nics)
+
+    def nics(self) -> Mapping[str, tuple[int, int]]:
+        nics = {}
+        for line in self._net.read().splitlines()[2:]:
+            name, _, counters = line.partition(b":")
+            fields = counters.split()
+            nics[name.strip().decode()] = (int(fields[8]), int(fields[0]))
+        return nics
+
+    def mem(self) -> _Memory:
+        info: dict[bytes, int] = {}
+        for line in self._meminfo.read().split(b"\n", 24)[:24]:
+            key, _, value = line.partition(b":")
+            if fields := value.split():
+                info[bytes(key)] = int(fields[0]) * 1024
+
+        total, available = info.get(b"MemTotal"), info.get(b"MemAvailable")
+        if not total or available is None:
+            return super().mem()
+
+        swap_total = info.get(b"SwapTotal", 0)
+        swap_used = swap_total - info.get(b"SwapFree", swap_total)
+        return _Memory(
+            used=(total - available) / total,
+            swap=swap_used / swap_total if swap_total else 0,
+            dirty=info.get(b"Dirty", 0),
+            writeback=info.get(b"Writeback", 0),
+        )
+
+    def swaps(self) -> tuple[int, int]:
+        data = self._vmstat.read()
+        pages = []
+        for key in (b"\npswpin ", b"\npswpout "):
+            start = data.find(key) + len(key)
+            pages.append(int(data[start : data.find(b"\n", start)]))
+        swap_in, swap_out = pages
+        return swap_in * self._page, swap_out * self._page
+
+    def top(self) -> _Top | None:
+        return self._procs.sample()
+
+    def battery(self) -> int | None:
+        if self._battery:
+            with suppress(OSError, ValueError):
+                return int(self._battery.read())
+        return None
+
+
+@cache
+def _backend() -> _Psutil:
+    if _LINUX:
+        with suppress(OSError):
+            return _Procfs()
+    return _Psutil()
+
+
+def _pernic(args: _Args) -> bool:
+    return bool(args.nic_include or args.nic_exclude or args.nic_top)
+
+
+def _perdisk(args: _Args) -> bool:
+    return bool(args.perdisk or args.disk_include or args.disk_exclude or args.disk_top)
+
+
+def _snap(args: _Args) -> _Snapshot:
+    backend = _backend()
+    t = time()
+    cpu, cores = backend.cpu(percore=args.percore > 0)
+
+    if _perdisk(args):
+        perdisk = backend.disks()
+        names = _select(
+            frozenset(perdisk),
+            include=args.disk_include,
+            exclude=args.disk_exclude,
+            defaults=_top_level_disks(),
+        )
+        disk = _disk_sum(perdisk[name] for name in names)
+        disks = _busiest_counters(perdisk, names=names, limit=_DISKS)
+    elif "disks" in _probes(args) and (devices := _top_level_disks()):
+        perdisk, blocks = backend.disks(), _block_devices()
+        names = sorted(devices & perdisk.keys())
+        disk = _disk_sum(io for name, io in perdisk.items() if name in blocks)
+        disks = _busiest_counters(perdisk, names=names, limit=_DISKS)
+    else:
+        disk, disks = backend.disk(), {}
+
+    if _pernic(args):
+        pernic = backend.nics()
+        names = _select(
+            frozenset(pernic),
+            include=args.nic_include,
+            exclude=args.nic_exclude,
+        )
+        net_sent = sum(pernic[name][0] for name in names)
+        net_recv = sum(pernic[name][1] for name in names)
+        nics = _busiest_counters(pernic, names=names, limit=_NICS)
+    else:
+        nics = {}
+        net_sent, net_recv = backend.net()
+
+    swap_in, swap_out = backend.swaps() if args.swap else (0, 0)
+
+    snapshot = _Snapshot(
+        time=t,
+        cpu_times=cpu,
+        disk=disk,
+        net_sent=net_sent,
+        net_recv=net_recv,
+        cores=tuple(map(_cpu_split, cores[:_CORES])),
+        nics=nics,
+        disks=disks,
+        swap_in=swap_in,
+        swap_out=swap_out,
+    )
+    return snapshot
+
+
+def _later(delay: float, args: _Args) -> _Snapshot:
+    sleep(delay)
+    return _snap(args)
+
+
+def _battery() -> int | None:
+    return _backend().battery()
+
+
+class _Pressure:
+    def __init__(self, root: str, suffix: str) -> None:
+        self._files = {}
+        for name in _PRESSURE:
+            with suppress(OSError):
+                self._files[name] = _File(join(root, name + suffix))
+
+    def read(self) -> Mapping[str, _Stall]:
+        stalls = {}
+        for name, file in self._files.items():
+            avg10 = {b"some": 0.0, b"full": 0.0}
+            with suppress(OSError, ValueError):
+                for line in file.read().splitlines():
+                    kind, _, fields = line.partition(b" ")
+                    _, _, value = fields.partition(b" ")[0].partition(b"=")
+                    avg10[bytes(kind)] = float(value) / 100
+                stalls[name] = _Stall(some=avg10[b"some"], full=avg10[b"full"])
+        return stalls
+
+
+@cache
+def _host_pressure() -> _Pressure:
+    return _Pressure("/proc/pressure", suffix="")
+
+
+@cache
+def _cgroup_root() -> str | None:
+    return next((root for root in _CGROUPS if isfile(join(root, "cgroup.procs"))), None)
+
+
+@lru_cache(maxsize=8)
+def _cgroup_pressure(cgroup: str) -> _Pressure | None:
+    if root := _cgroup_root():
+        return _Pressure(join(root, cgroup.lstrip("/")), suffix=".pressure")
+    else:
+        return None
+
+
+def _cgroup(pid: int) -> str | None:
+    with suppress(OSError), open(f"/proc/{pid}/cgroup") as fd:
+        for line in fd:
+            if line.startswith("0::"):
+                return line[3:].strip()
+    return None
+
+
+def _pressure(pane_pid: int) -> tuple[Mapping[str, _Stall], Mapping[str, _Stall]]:
+    if not _LINUX:
+        return {}, {}
+
+    host = _host_pressure().read()
+    if pane_pid and (cgroup := _cgroup(pane_pid)) and cgroup != "/":
+        pressure = _cgroup_pressure(cgroup)
+        return host, pressure.read() if pressure else {}
+    else:
+        return host, {}
+
+
+def _top() -> _Top | None:
+    if top := _backend().top():
+        return top
+    else:
+        sleep(_COLD)
+        return _backend().top()
+
+
+def _mem() -> _Memory:
+    return _backend().mem()
+
+
+def _cpu_split(times: Mapping[str, float]) -> tuple[float, float]:
+    tot = sum(times.values())
+    if _LINUX:
+        tot -= times.get("guest", 0)
+        tot -= times.get("guest_nice", 0)
+
+    busy = tot
+    busy -= times["idle"]
+    busy -= times.get("iowait", 0)
+    return busy, tot
+
+
+def _cpu(delta: Mapping[str, float]) -> float:
+    busy, tot = _cpu_split(delta)
+    try:
+        return busy / tot
+    except ZeroDivisionError:
+        return 0
+
+
+def _cpu_share(delta: Mapping[str, float], field: str) -> float:
+    _, tot = _cpu_split(delta)
+    return delta.get(field, 0) / tot if tot > 0 else 0
+
+
+def _io_stats(d1: _DiskIO, d2: _DiskIO, time_adjust: float) -> _IOStats:
+    reads = max(0, d2.read_count - d1.read_count)
+    writes = max(0, d2.write_count - d1.write_count)
+    waited = max(0, d2.read_time + d2.write_time - d1.read_time - d1.write_time)
+    busy = max(0, d2.busy_time - d1.busy_time)
+    return _IOStats(
+        reads=reads * time_adjust,
+        writes=writes * time_adjust,
+        wait=waited / (reads + writes) / 1000 if reads + writes else 0,
+        util=min(1, busy / 1000 * time_adjust),
+    )
+
+
+def _io_total(disks: Mapping[str, _IOStats]) -> _IOStats:
+    ops = sum(io.reads + io.writes for io in disks.values())
+    waited = sum(io.wait * (io.reads + io.writes) for io in disks.values())
+    return _IOStats(
+        reads=sum(io.reads for io in disks.values()),
+        writes=sum(io.writes for io in disks.values()),
+        wait=waited / ops if ops else 0,
+        util=max(io.util for io in disks.values()),
+    )
+
+
+def _record(snapshot: _Snapshot, mem: float | None) -> _Record:
+    busy, tot = _cpu_split(snapshot.cpu_times)
+    record = _Record(
+        time=snapshot.time,
+        cpu_busy=busy,
+        cpu_total=tot,
+        mem=nan if mem is None else mem,
+        disk_read=snapshot.disk.read_bytes,
+        disk_write=snapshot.disk.write_bytes,
+        net_sent=snapshot.net_sent,
+        net_recv=snapshot.net_recv,
+    )
+    return record
+
+
+def _measure(s1: _Snapshot, s2: _Snapshot, mem: _Memory | None) -> _Stats:
+    time_adjust = 1 / (s2.time - s1.time)
+    cpu_delta = {
+        k: max(0, v2 - v1)
+        for (k, v1), (_, v2) in zip(s1.cpu_times.items(), s2.cpu_times.items())
+    }
+    disks_io = {
+        name: _io_stats(s1.disks[name], io, time_adjust=time_adjust)
+        for name, io in s2.disks.items()
+        if name in s1.disks
+    }
+    stats = _Stats(
+        cpu=_cpu(cpu_delta),
+        mem=None if mem is None else mem.used,
+        disk_read=max(0, s2.disk.read_bytes - s1.disk.read_bytes) * time_adjust,
+        disk_write=max(0, s2.disk.write_bytes - s1.disk.write_bytes) * time_adjust,
+        net_sent=max(0, s2.net_sent - s1.net_sent) * time_adjust,
+        net_recv=max(0, s2.net_recv - s1.net_recv) * time_adjust,
+        cores=(
+            tuple(
+                (b2 - b1) / (t2 - t1) if t2 > t1 else 0
+                for (b1, t1), (b2, t2) in zip(s1.cores, s2.cores)
+            )
+            if len(s1.cores) == len(s2.cores)
+            else ()
+        ),
+        nics={
+            name: (
+                max(0, sent - s1.nics[name][0]) * time_adjust,
+                max(0, recv - s1.nics[name][1]) * time_adjust,
+            )
+            for name, (sent, recv) in s2.nics.items()
+            if name in s1.nics
+        },
+        disks={
+            name: (
+                max(0, io.read_bytes - s1.disks[name].read_bytes) * time_adjust,
+                max(0, io.write_bytes - s1.disks[name].write_bytes) * time_adjust,
+            )
+            for name, io in s2.disks.items()
+            if name in s1.disks
+        },
+        io=(
+            _io_total(disks_io)
+            if disks_io
+            else _io_stats(s1.disk, s2.disk, time_adjust=time_adjust)
+        ),
+        disks_io=disks_io,
+        steal=_cpu_share(cpu_delta, "steal"),
+        iowait=_cpu_share(cpu_delta, "iowait"),
+        swap=mem.swap if mem else 0,
+        swap_in=max(0, s2.swap_in - s1.swap_in) * time_adjust,
+        swap_out=max(0, s2.swap_out - s1.swap_out) * time_adjust,
+        dirty=mem.dirty if mem else 0,
+        writeback=mem.writeback if mem else 0,
+    )
+    return stats
+
+
+def _bg(lo: float, hi: float, val: float, colours: _Colours) -> str:
+    if val < lo:
+        return colours.lo
+    elif val < hi:
+        return colours.md
+    else:
+        return colours.hi
+
+
+def _colour(lo: float, hi: float, val: float, text: str, colours: _Colours) -> str:
+    return f"#[bg={_bg(lo, hi, val=val, colours=colours)}]{text}{colours.tr}"
+
+
+def _style(style: str, text: str) -> str:
+    return f"#[{style}]{text}#[none]"
+
+
+class _Future(Generic[_T]):
+    def __init__(self, fn: Callable[[], _T]) -> None:
+        self._done = Event()
+        self._value: tuple[_T] | None = None
+        self._error: BaseException | None = None
+        Thread(target=self._run, args=(fn,), daemon=True).start()
+
+    def _run(self, fn: Callable[[], _T]) -> None:
+        try:
+            self._value = (fn(),)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._done.set()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def result(self, timeout: float) -> _T:
+        if not self._done.wait(timeout):
+            raise TimeoutError()
+        elif self._value:
+            (value,) = self._value
+            return value
+        else:
+            assert self._error
+            raise self._error
+
+
+def _await(fut: _Future[_T] | None, deadline: float, default: _U) -> _T | _U:
+    if not fut:
+        return default
+    try:
+        return fut.result(timeout=max(0, deadline - monotonic()))
+    except Exception:
+        return default
+
+
+class _Cache(Generic[_T]):
+    def __init__(
+        self, fn: Callable[[], _T], period: float, timeout: float, default: _T
+    ) -> None:
+        self._fn, self._period, self._timeout = fn, period, timeout
+        self._default = default
+        self._started = -inf
+        self._probe: _Future[_T] | None = None
+        self._value: tuple[_T] | None = None
+        self._lock = Lock()
+
+    def get(self) -> _T:
+        with self._lock:
+            return self._get()
+
+    def _get(self) -> _T:
+        now = monotonic()
+        if not self._probe or (
+            self._probe.done() and now - self._started >= self._period
+        ):
+            self._started, self._probe = now, _Future(self._fn)
+
+        try:
+            value = self._probe.result(timeout=0 if self._value else self._timeout)
+        except TimeoutError:
+            if not self._value or monotonic() - self._started > self._timeout:
+                self._value = (self._default,)
+        except Exception:
+            self._value = (self._default,)
+        else:
+            self._value = (value,)
+
+        (value,) = self._value
+        return value
+
+    def running(self) -> bool:
+        with self._lock:
+            return bool(self._probe and not self._probe.done())
+
+
+class _Mounts:
+    def __init__(self) -> None:
+        from select import POLLERR, POLLPRI, poll
+
+        self._file = _File("/proc/self/mountinfo")
+        self._poll = poll()
+        self._poll.register(self._file.fileno(), POLLERR | POLLPRI)
+        self._mounts = self._parse()
+
+    def _parse(self) -> Sequence[str]:
+        mounts = (line.split(b" ", 5) for line in self._file.read().splitlines())
+        return sorted(
+            (_unescape(fields[4]) for fields in mounts if len(fields) > 4),
+            key=len,
+            reverse=True,
+        )
+
+    def find(self, path: str) -> str:
+        if self._poll.poll(0):
+            self._mounts = self._parse()
+        for mount in self._mounts:
+            if path == mount or path.startswith(mount.rstrip("/") + "/"):
+                return mount
+        return "/"
+
+
+def _unescape(raw: bytes | bytearray) -> str:
+    text = raw.decode(errors="replace")
+    for code in ("040", "011", "012", "134"):
+        text = text.replace(f"\\{code}", chr(int(code, 8)))
+    return text
+
+
+@cache
+def _mounts() -> _Mounts | None:
+    if _LINUX:
+        with suppress(OSError):
+            return _Mounts()
+    return None
+
+
+def _mount_of(path: str) -> str:
+    path = realpath(path)
+    if mounts := _mounts():
+        return mounts.find(path)
+
+    while not ismount(path):
+        path = dirname(path)
+    return path
+
+
+def _statvfs(mount: str) -> _Space | None:
+    try:
+        st = statvfs(mount)
+    except OSError:
+        return None
+
+    used, avail = st.f_blocks - st.f_bfree, st.f_bavail
+    return _Space(
+        free=avail * st.f_frsize,
+        used=used / (used + avail) if used + avail else 0,
+        inodes=1 - st.f_ffree / st.f_files if st.f_files else 0,
+    )
+
+
+class _Spaces:
+    def __init__(self) -> None:
+        self._caches: dict[tuple[str, float, float], _Cache[_Space | None]] = {}
+        self._lock = Lock()
+
+    def get(self, mount: str, ttl: float, timeout: float) -> _Space | None:
+        key = (mount, ttl, timeout)
+        with self._lock:
+            space = self._caches.pop(key, None) or _Cache(
+                partial(_statvfs, mount), period=ttl, timeout=timeout, default=None
+            )
+            self._caches[key] = space
+            for stale in [*self._caches][:-_SPACES]:
+                if not self._caches[stale].running():
+                    del self._caches[stale]
+        return space.get()
+
+
+@cache
+def _spaces() -> _Spaces:
+    return _Spaces()
+
+
+def _filesystems(args: _Args) -> Mapping[str, _Space]:
+    mounts = [*_globs(args.mounts)]
+    if args.pane_path:
+        mounts.append(_mount_of(args.pane_path))
+
+    ttl = _period(args, "fs", default=args.fs_ttl)
+    timeout, spaces = _timeout(args, "fs"), {}
+    for mount in dict.fromkeys(mounts):
+        if space := _spaces().get(mount, ttl=ttl, timeout=timeout):
+            spaces[mount] = space
+    return spaces
+
+
+@lru_cache(maxsize=4)
+def _top_cache(period: float, timeout: float) -> _Cache[_Top | None]:
+    return _Cache(_top, period=period, timeout=timeout, default=None)
+
+
+def _cached_top(args: _Args) -> _Top | None:
+    return _top_cache(_period(args, "procs"), timeout=_timeout(args, "procs")).get()
+
+
+@lru_cache(maxsize=16)
+def _pressure_cache(
+    pane_pid: int, period: float, timeout: float
+) -> _Cache[tuple[Mapping[str, _Stall], Mapping[str, _Stall]]]:
+    return _Cache(
+        partial(_pressure, pane_pid), period=period, timeout=timeout, default=({}, {})
+    )
+
+
+def _cached_pressure(
+    args: _Args,
+) -> tuple[Mapping[str, _Stall], Mapping[str, _Stall]]:
+    return _pressure_cache(
+        args.pane_pid,
+        period=_period(args, "pressure"),
+        timeout=_timeout(args, "pressure"),
+    ).get()
+
+
+def _tick(
+    s1: _Snapshot | None,
+    args: _Args,
+    wait: float | None = None,
+    ssh: _Future[_Latency | None] | None = None,
+    probes: frozenset[str] | None = None,
+    lock: IO[str] | None = None,
+) -> tuple[_Tick, _Snapshot | None]:
+    now, interval = monotonic(), args.interval
+    probes = _probes(args) if probes is None else probes
+    delay = (
+        max(0, (interval if wait is None else wait) - (time() - s1.time)) if s1 else 0
+    )
+
+    snap = _Future(partial(_later, delay, args=args)) if s1 else None
+    battery = _Future(_battery) if "battery" in probes else None
+    mem = _Future(_mem) if "mem" in probes else None
+    top = _Future(partial(_cached_top, args)) if "procs" in probes else None
+    pressure = (
+        _Future(partial(_cached_pressure, args)) if "pressure" in probes else None
+    )
+    filesystems = _Future(partial(_filesystems, args)) if "fs" in probes else None
+
+    timeout = partial(_timeout, args)
+    s2 = _await(snap, deadline=now + delay + timeout("snap"), default=None)
+    used = _await(mem, deadline=now + timeout("mem"), default=None)
+    stats = _measure(s1, s2, mem=used) if s1 and s2 else None
+    smoothed: Mapping[str, _Rates] = {}
+    if s1 and s2 and stats and lock and _acquire(lock, LOCK_EX, timeout=_GRACE):
+        _save(args, prev=s1, cur=s2)
+        _ring(_scope(args)).push(_record(s2, mem=used.used if used else None))
+        rates = _Rates(
+            cpu=stats.cpu,
+            disk_read=stats.disk_read,
+            disk_write=stats.disk_write,
+            net_sent=stats.net_sent,
+            net_recv=stats.net_recv,
+        )
+        smoothed = _averages(_scope(args)).update(
+            s2.time, rates, half_life=args.half_life
+        )
+    elif stats:
+        smoothed = _averages(_scope(args)).read()
+    if lock:
+        flock(lock, LOCK_UN)
+
+    host, pane = _await(pressure, deadline=now + timeout("pressure"), default=({}, {}))
+    tick = _Tick(
+        ssh=(
+            _await(ssh, deadline=now + timeout("ssh") + _GRACE, default=_LOST)
+            if ssh
+            else None
+        ),
+        stats=stats,
+        battery=_await(battery, deadline=now + timeout("battery"), default=None),
+        smoothed=smoothed,
+        top=_await(top, deadline=now + timeout("procs") + _GRACE, default=None),
+        pressure=host,
+        pane_pressure=pane,
+        filesystems=_await(
+            filesystems, deadline=now + timeout("fs") + _GRACE, default={}
+        ),
+    )
+    return tick, s2
+
+
+def _cell(fraction: float) -> str:
+    level = int(fraction * len(_BLOCKS)) if isfinite(fraction) else 0
+    return _BLOCKS[min(len(_BLOCKS) - 1, max(0, level))]
+
+
+def _log_scale(rate: float) -> float:
+    return (log10(max(1, rate)) - 3) / 6
+
+
+class _Sparks:
+    def __init__(self) -> None:
+        self._cells = {
+            name: deque[str](maxlen=_SPARKS)
+            for name in ("cpu", "mem", "net_sent", "net_recv")
+        }
+
+    def push(self, cpu: float, mem: float, net_sent: float, net_recv: float) -> None:
+        self._cells["cpu"].append(_cell(cpu))
+        self._cells["mem"].append(_cell(mem))
+        self._cells["net_sent"].append(_cell(_log_scale(net_sent)))
+        self._cells["net_recv"].append(_cell(_log_scale(net_recv)))
+
+    def replay(self, history: Sequence[_Record]) -> None:
+        for r1, r2 in pairwise(history[-_SPARKS - 1 :]):
+            if (elapsed := r2.time - r1.time) > 0:
+                tot = r2.cpu_total - r1.cpu_total
+                self.push(
+                    cpu=(r2.cpu_busy - r1.cpu_busy) / tot if tot > 0 else 0,
+                    mem=r2.mem,
+                    net_sent=(r2.net_sent - r1.net_sent) / elapsed,
+                    net_recv=(r2.net_recv - r1.net_recv) / elapsed,
+                )
+
+    def lines(self) -> Mapping[str, str]:
+        return {name: "".join(cells) for name, cells in self._cells.items()}
+
+
+def _heat(
+    lo: float, hi: float, cores: Sequence[float], width: int, colours: _Colours
+) -> str:
+    size = -(-len(cores) // width)
+    cells = tuple(max(cores[i : i + size]) for i in range(0, len(cores), size))
+
+    def bg(val: float) -> str:
+        return _bg(lo, hi, val=val, colours=colours)
+
+    runs = (
+        f"#[bg={colour}]" + "".join(_cell(val) for val in group)
+        for colour, group in groupby(cells, key=bg)
+    )
+    return "".join(runs) + colours.tr
+
+
+def _size(size: float) -> str:
+    return f"{_human_readable_size(size, precision=0)}B".rjust(5)
+
+
+def _net(sent: float, recv: float, spark_sent: str = "", spark_recv: str = "") -> str:
+    return f"⇡ {_size(sent)}{spark_sent}, ⇣ {_size(recv)}{spark_recv}"
+
+
+def _disk(read: float, write: float) -> str:
+    return f"r {_size(read)}, w {_size(write)}"
+
+
+def _busiest(
+    devices: Mapping[str, tuple[float, float]], top: int
+) -> Sequence[tuple[str, tuple[float, float]]]:
+    return sorted(devices.items(), key=lambda dev: sum(dev[1]), reverse=True)[:top]
+
+
+def _segment(name: str, *probes: str) -> Callable[[_Render], _Render]:
+    def register(render: _Render) -> _Render:
+        _SEGMENTS[name] = _Segment(probes=frozenset(probes), render=render)
+        return render
+
+    return register
+
+
+def _spark(args: _Args, tick: _Tick, name: str) -> str:
+    spark = min(args.spark, _SPARKS)
+    line = tick.sparks.get(name, "")
+    return f" {line[-spark:]}" if spark and line else ""
+
+
+@_segment("ssh", "ssh")
+def _ssh_segment(args: _Args, colours: _Colours, tick: _Tick) -> Iterator[str]:
+    if ssh := tick.ssh:
+        ping = (
+            "~ " + format(ssh.rtt * 1000, ".1f")
+            if isfinite(ssh.rtt)
+            else "> " + format(args.interval * 1000, ".0f")
+        )
+        jitter = "±" + format(ssh.jitter * 1000, ".1f") if ssh.jitter else ""
+        loss = " " + format(ssh.loss, ".0%") if ssh.loss else ""
+        yield f"SSH {ping}{jitter}ms{loss}"
+
+
+@_segment("net", "snap")
+def _net_segment(args: _Args, colours: _Colours, tick: _Tick) -> Iterator[str]:
+    if not (stats := tick.stats):
+        return
+    elif args.nic_top:
+        for name, (sent, recv) in _busiest(stats.nics, top=args.nic_top):
+            yield f"[{name} {_net(sent, recv)}]"
+    else:
+        spark_sent = _spark(args, tick=tick, name="net_sent")
+        spark_recv = _spark(args, tick=tick, name="net_recv")
+        yield f"[{_net(stats.net_sent, stats.net_recv, spark_sent, spark_recv)}]"
+
+
+@_segment("disk", "snap")
+def _disk_segment(args: _Args, colours: _Colours, tick: _Tick) -> Iterator[str]:
+    if not (stats := tick.stats):
+        return
+    elif args.disk_top:
+        for name, (read, write) in _busiest(stats.disks, top=args.disk_top):
+            yield f"[{name} {_disk(read, write)}]"
+    else:
+        yield f"[{_disk(stats.disk_read, stats.disk_write)}]"
+
+
+def _iops(args: _Args, colours: _Colours, name: str, io: _IOStats) -> Iterator[str]:
+    util = format(io.util, "4.0%")
+    yield _colour(
+        args.lo, args.hi, val=io.util, text=f" {name}{util} ", colours=colours
+    )
+    wait = format(io.wait * 1000, ".1f")
+    yield f"[r {io.reads:.0f}/s, w {io.writes:.0f}/s, ~ {wait}ms]"
+
+
+@_segment("iops", "snap", "disks")
+def _iops_segment(args: _Args, colours: _Colours, tick: _Tick) -> Iterator[str]:
+    if not (stats := tick.stats):
+        return
+    elif args.disk_top:
+        devices = sorted(
+            stats.disks_io.items(), key=lambda dev: dev[1].util, reverse=True
+        )
+        for name, io in devices[: args.disk_top]:
+            yield from _iops(args, colours=colours, name=f"{name} ", io=io)
+    else:
+        yield from _iops(args, colours=colours, name="io", io=stats.io)
+
+
+@_segment("cpu", "snap")
+def _cpu_segment(args: _Args, colours: _Colours, tick: _Tick) -> Iterator[str]:
+    if stats := tick.stats:
+        lo, hi = args.lo, args.hi
+        cpu = format(stats.cpu, "4.0%")
+        yield _colour(lo, hi, val=stats.cpu, text=f" λ{cpu} ", colours=colours)
+        if spark_cpu := _spark(args, tick=tick, name="cpu").lstrip():
+            yield spark_cpu
+        if args.percore and stats.cores:
+            yield _heat(lo, hi, cores=stats.cores, width=args.percore, colours=colours)
+
+
+@_segment("steal", "snap")
+def _steal_segment(args: _Args, colours: _Colours, tick: _Tick) -> Iterator[str]:
+    if stats := tick.stats:
+        lo, hi = args.steal_lo, args.steal_hi
+        steal = format(stats.steal, "3.0%")
+        yield _colour(lo, hi, val=stats.steal, text=f" st {steal} ", colours=colours)
+        if args.iowait:
+            iowait = format(stats.iowait, "3.0%")
+            yield _colour(
+                lo, hi, val=stats.iowait, text=f" wa {iowait} ", colours=colours
+            )
+
+
+@_segment("mem", "snap", "mem")
+def _mem_segment(args: _Args, colours: _Colours, tick: _Tick) -> Iterator[str]:
+    if not (stats := tick.stats) or stats.mem is None:
+        return
+
+    lo, hi = args.lo, args.hi
+    mem = format(stats.mem, "4.0%")
+    yield _colour(lo, hi, val=stats.mem, text=f" τ{mem} ", colours=colours)
+    if spark_mem := _spark(args, tick=tick, name="mem").lstrip():
+        yield spark_mem
+    if args.swap:
+        swap = format(stats.swap, "4.0%")
+        yield _colour(lo, hi, val=stats.swap, text=f" swap{swap} ", colours=colours)
+        yield f"[si {_size(stats.swap_in)}, so {_size(stats.swap_out)}]"
+    if args.dirty:
+        yield f"[dirty {_size(stats.dirty)}, wb {_size(stats.writeback)}]"
+
+
+@_segment("top", "procs")
+def _top_segment(args: _Args, colours: _Colours, tick: _Tick) -> Iterator[str]:
+    if top := tick.top:
+        procs = (("λ", top.cpu), ("τ", top.rss))
+        yield "[" + ", ".join(
+            f"{sym} {proc.name}:{proc.pid} {format(proc.share, '.0%')}"
+            for sym, proc in procs
+            if proc
+        ) + "]"
+
+
+def _stalls(args: _Args, colours: _Colours, stalls: Mapping[str, _Stall]) -> str:
+    return "".join(
+        _colour(
+            args.lo,
+            args.hi,
+            val=stall.some,
+            text=f" {_PRESSURE[name]} {format(stall.some, '.0%')}"
+            f"/{format(stall.full, '.0%')} ",
+            colours=colours,
+        )
+        for name, stall in stalls.items()
+    )
+
+
+@_segment("psi", "pressure")
+def _psi_segment(args: _Args, colours: _Colours, tick: _Tick) -> Iterator[str]:
+    if tick.pressure:
+        yield f"ψ{_stalls(args, colours=colours, stalls=tick.pressure)}"
+    if tick.pane_pressure:
+        yield f"ψ pane{_stalls(args, colours=colours, stalls=tick.pane_pressure)}"
+
+
+@_segment("fs", "fs")
+def _fs_segment(args: _Args, colours: _Colours, tick: _Tick) -> Iterator[str]:
+    for mount, space in tick.filesystems.items():
+        inodes = format(space.inodes, ".0%")
+        yield _colour(
+            args.lo,
+            args.hi,
+            val=max(space.used, space.inodes),
+            text=f" {mount} {_size(space.free).lstrip()} ι{inodes} ",
+            colours=colours,
+        )
+
+
+@_segment("battery", "battery")
+def _battery_segment(args: _Args, colours: _Colours, tick: _Tick) -> Iterator[str]:
+    if tick.battery is not None:
+        yield "|"
+        yield _style("italics", text=f"{tick.battery}%")
+
+
+@cache
+def _plugins() -> Mapping[str, _Segment]:
+    from importlib.metadata import entry_points
+
+    plugins = {}
+    for entry in entry_points(group=_ENTRY_POINTS):
+        with suppress(Exception):
+            render = entry.load()
+            probes = frozenset(getattr(render, "probes", ()))
+            plugins[entry.name] = _Segment(probes=probes, render=render)
+    return plugins
+
+
+def _lookup(name: str) -> _Segment:
+    if segment := _SEGMENTS.get(name) or _plugins().get(name):
+        return segment
+    else:
+        raise SystemExit(f"unknown segment: {name}")
+
+
+@lru_cache(maxsize=4)
+def _segments(spec: str) -> Mapping[str, _Segment]:
+    return {name: _lookup(name) for name in _globs(spec)}
+
+
+@lru_cache(maxsize=8)
+def _schedule(spec: str) -> Mapping[str, float]:
+    schedule = {}
+    for item in _globs(spec):
+        name, _, seconds = item.partition(":")
+        _lookup(name)
+        try:
+            schedule[name] = float(seconds)
+        except ValueError as e:
+            raise SystemExit(f"bad value: {item}") from e
+    return schedule
+
+
+def _probes(args: _Args) -> frozenset[str]:
+    segments = _segments(args.segments).values()
+    return frozenset(chain.from_iterable(s.probes for s in segments))
+
+
+@lru_cache(maxsize=4)
+def _scope(args: _Args) -> str:
+    sampling = (
+        args.interval,
+        args.refresh,
+        args.timeout,
+        args.half_life,
+        args.percore > 0,
+        _pernic(args),
+        args.nic_include,
+        args.nic_exclude,
+        _perdisk(args),
+        args.disk_include,
+        args.disk_exclude,
+        args.swap,
+        sorted(_probes(args) & _SAMPLED),
+    )
+    return f"{_host()}.{crc32(repr(sampling).encode()):08x}"
+
+
+def _every(args: _Args, probe: str, spec: str, default: float | None = None) -> float:
+    schedule = _schedule(spec)
+    fallback = args.interval if default is None else default
+    return min(
+        (
+            schedule.get(name, fallback)
+            for name, segment in _segments(args.segments).items()
+            if probe in segment.probes
+        ),
+        default=fallback,
+    )
+
+
+def _period(args: _Args, probe: str, default: float | None = None) -> float:
+    return _every(args, probe=probe, spec=args.refresh, default=default)
+
+
+def _timeout(args: _Args, probe: str) -> float:
+    return _every(args, probe=probe, spec=args.timeout)
+
+
+def _stat_lines(args: _Args, colours: _Colours, tick: _Tick) -> Iterator[str]:
+    for segment in _segments(args.segments).values():
+        yield from segment.render(args, colours, tick)
+
+
+def _line(lines: Iterable[str]) -> str:
+    return "".join(chain.from_iterable(zip(lines, repeat(" "))))
+
+
+def _parse_args(argv: Sequence[str]) -> _Args:
+    kinds = _Args.__annotations__
+    opts: dict[str, Any] = {}
+    it = iter(argv)
+    for arg in it:
+        key, eq, val = arg.removeprefix("--").partition("=")
+        name = key.replace("-", "_")
+        if not arg.startswith("--") or name not in kinds:
+            raise SystemExit(f"unknown argument: {arg}")
+        elif kinds[name] is bool:
+            opts[name] = True
+        elif not eq and (val := next(it, "")) == "":
+            raise SystemExit(f"missing value: {arg}")
+        else:
+            try:
+                opts[name] = kinds[name](val)
+            except ValueError as e:
+                raise SystemExit(f"bad value: {arg} {val}") from e
+
+    if missing := kinds.keys() - opts.keys() - _Args._field_defaults.keys():
+        names = (f"--{name.replace('_', '-')}" for name in sorted(missing))
+        raise SystemExit(f"missing arguments: {', '.join(names)}")
+    elif bad := {
+        f"--{name.replace('_', '-')}={val}"
+        for name, val in opts.items()
+        if name.endswith("_rate") and val not in {"now", *_HORIZONS}
+    }:
+        raise SystemExit(f"bad value: {', '.join(sorted(bad))}")
+    else:
+        args = _Args(**opts)
+        _segments(args.segments)
+        _schedule(args.refresh)
+        _schedule(args.timeout)
+        return args
+
+
+def _smooth(args: _Args, tick: _Tick) -> _Tick:
+    if not (stats := tick.stats):
+        return tick
+
+    cpu = tick.smoothed.get(args.cpu_rate)
+    net = tick.smoothed.get(args.net_rate)
+    disk = tick.smoothed.get(args.disk_rate)
+    stats = stats._replace(
+        cpu=cpu.cpu if cpu else stats.cpu,
+        disk_read=disk.disk_read if disk else stats.disk_read,
+        disk_write=disk.disk_write if disk else stats.disk_write,
+        net_sent=net.net_sent if net else stats.net_sent,
+        net_recv=net.net_recv if net else stats.net_recv,
+    )
+    return tick._replace(stats=stats)
+
+
+def _render(args: _Args, tick: _Tick) -> str:
+    colours = _Colours(
+        lo=args.colour_lo, md=args.colour_md, hi=args.colour_hi, tr=args.colour_tr
+    )
+    return _line(_stat_lines(args, colours=colours, tick=_smooth(args, tick=tick)))
+
+
+def _acquire(lock: IO[str], mode: int, timeout: float) -> bool:
+    deadline = monotonic() + timeout
+    while True:
+        try:
+            flock(lock, mode | LOCK_NB)
+        except BlockingIOError:
+            if monotonic() >= deadline:
+                return False
+            sleep(_POLL)
+        else:
+            return True
+
+
+def _elect(lock: IO[str], timeout: float) -> bool:
+    if _acquire(lock, LOCK_EX, timeout=0):
+        return True
+    else:
+        _acquire(lock, LOCK_SH, timeout=timeout)
+        return False
+
+
+def _reuse(
+    prev: _Snapshot, cur: _Snapshot, args: _Args, ssh: _Future[_Latency | None] | None
+) -> _Tick:
+    now, probes = monotonic(), _probes(args)
+    tick = _Tick(
+        ssh=(
+            _await(ssh, deadline=now + _timeout(args, "ssh") + _GRACE, default=_LOST)
+            if ssh
+            else None
+        ),
+        stats=_measure(prev, cur, mem=_mem() if "mem" in probes else None),
+        battery=_battery() if "battery" in probes else None,
+        smoothed=_averages(_scope(args)).read(),
+    )
+    if "procs" in probes:
+        tick = tick._replace(top=_cached_top(args))
+    if "pressure" in probes:
+        host, pane = _cached_pressure(args)
+        tick = tick._replace(pressure=host, pane_pressure=pane)
+    if "fs" in probes:
+        tick = tick._replace(filesystems=_filesystems(args))
+    return tick
+
+
+def _sample(args: _Args) -> _Tick:
+    probes = _probes(args)
+    peer = _client() if "ssh" in probes else ""
+    ssh = _Future(partial(_ssh, peer, _timeout(args, "ssh"))) if peer else None
+    if "snap" not in probes:
+        tick, _ = _tick(None, args=args, ssh=ssh)
+        return tick
+
+    path = _path(_scope(args), ".tick")
+    makedirs(dirname(path), exist_ok=True)
+    with open(path, "a") as lock:
+        writer = _elect(lock, timeout=args.interval + _GRACE)
+        prev, cur = _load(args)
+        fresh = _GRACE if writer else args.interval
+        if not writer and not (prev and cur and time() - cur.time <= fresh):
+            writer = _acquire(lock, LOCK_EX, timeout=_GRACE)
+            prev, cur = _load(args)
+        if prev and cur and (not writer or time() - cur.time <= fresh):
+            flock(lock, LOCK_UN)
+            tick = _reuse(prev, cur, args=args, ssh=ssh)
+        else:
+            s1 = cur or _snap(args)
+            wait = min(args.interval, _COLD) if args.instant else None
+            tick, _ = _tick(
+                s1, args=args, wait=wait, ssh=ssh, lock=lock if writer else None
+            )
+
+    if args.spark:
+        sparks = _Sparks()
+        sparks.replay(_ring(_scope(args)).history()[-args.spark - 1 :])
+        tick = tick._replace(sparks=sparks.lines())
+    return tick
+
+
+class _Sampler(Thread):
+    def __init__(self, args: _Args) -> None:
+        super().__init__(daemon=True)
+        self._args = args
+        self._ready = Event()
+        self._tick: _Tick | None = None
+        self._used = monotonic()
+
+    def run(self) -> None:
+        path = _path(_scope(self._args), ".tick")
+        makedirs(dirname(path), exist_ok=True)
+        with open(path, "a") as lock:
+            self._loop(lock)
+
+    def _loop(self, lock: IO[str]) -> None:
+        sparks = _Sparks()
+        sparks.replay(_ring(_scope(self._args)).history())
+        args = self._args
+        probes = _probes(args) & _SAMPLED
+        period = _period(args, "snap")
+        s1 = None
+        while monotonic() - self._used < _IDLE:
+            try:
+                if "snap" in probes and not s1:
+                    s1 = _snap(args)
+                if not s1:
+                    sleep(period)
+                tick, s2 = _tick(s1, args=args, wait=period, probes=probes, lock=lock)
+            except Exception:
+                from traceback import print_exc
+
+                print_exc()
+                self._tick = _Tick(ssh=None, stats=None, battery=None)
+                s1 = None
+                sleep(period)
+            else:
+                if stats := tick.stats:
+                    sparks.push(
+                        cpu=stats.cpu,
+                        mem=nan if stats.mem is None else stats.mem,
+                        net_sent=stats.net_sent,
+                        net_recv=stats.net_recv,
+                    )
+                self._tick = tick._replace(sparks=sparks.lines())
+                s1 = s2 or s1
+            finally:
+                self._ready.set()
+
+    def latest(self, timeout: float) -> _Tick | None:
+        self._used = monotonic()
+        self._ready.wait(timeout)
+        return self._tick
+
+
+class _Samplers:
+    def __init__(self) -> None:
+        self._samplers: dict[str, _Sampler] = {}
+        self._lock = Lock()
+
+    def get(self, args: _Args) -> _Sampler:
+        scope = _scope(args)
+        with self._lock:
+            sampler = self._samplers.get(scope)
+            if not sampler or not sampler.is_alive():
+                sampler = self._samplers[scope] = _Sampler(args)
+                sampler.start()
+        return sampler
+
+
+class _Peers:
+    def __init__(self) -> None:
+        self._caches: dict[tuple[str, float, float], _Cache[_Latency | None]] = {}
+        self._lock = Lock()
+
+    def latency(self, peer: str, period: float, timeout: float) -> _Latency | None:
+        if not peer:
+            return None
+        with self._lock:
+            if not (cache := self._caches.get((peer, period, timeout))):
+                cache = self._caches[peer, period, timeout] = _Cache(
+                    partial(_ssh, peer, timeout),
+                    period=period,
+                    timeout=timeout + _GRACE,
+                    default=_LOST,
+                )
+        return cache.get()
+
+
+@lru_cache(maxsize=4)
+def _battery_cache(period: float, timeout: float) -> _Cache[int | None]:
+    return _Cache(_battery, period=period, timeout=timeout, default=None)
+
+
+def _recv(conn: "socket") -> str:
+    buf = bytearray()
+    while chunk := conn.recv(4096):
+        buf.extend(chunk)
+    return buf.decode()
+
+
+def _reply(opts: _Args, peer: str, samplers: _Samplers, peers: _Peers) -> str:
+    if not (tick := samplers.get(opts).latest(timeout=opts.interval * 2)):
+        return ""
+
+    probes = _probes(opts)
+    if "ssh" in probes:
+        ssh = peers.latency(
+            peer, period=_period(opts, "ssh"), timeout=_timeout(opts, "ssh")
+        )
+        tick = tick._replace(ssh=ssh)
+    if "battery" in probes:
+        battery = _battery_cache(
+            _period(opts, "battery"), timeout=_timeout(opts, "battery")
+        )
+        tick = tick._replace(battery=battery.get())
+    if "procs" in probes:
+        tick = tick._replace(top=_cached_top(opts))
+    if "pressure" in probes:
+        host, pane = _cached_pressure(opts)
+        tick = tick._replace(pressure=host, pane_pressure=pane)
+    if "fs" in probes:
+        tick = tick._replace(filesystems=_filesystems(opts))
+    return "+" + _render(opts, tick=tick)
+
+
+def _respond(conn: "socket", args: _Args, samplers: _Samplers, peers: _Peers) -> None:
+    with conn:
+        try:
+            conn.settimeout(args.interval)
+            peer, *argv = _recv(conn).split("\0")
+            opts = _parse_args(tuple(filter(None, argv)))
+            reply = _reply(opts, peer=peer, samplers=samplers, peers=peers)
+        except SystemExit as e:
+            reply = f"-{e}"
+        except Exception:
+            from traceback import print_exc
+
+            print_exc()
+            reply = ""
+        with suppress(OSError):
+            conn.sendall(reply.encode())
+
+
+def _serve(args: _Args) -> None:
+    from socket import AF_UNIX, SOCK_STREAM, socket
+
+    path = _path(str(getuid()), ".sock")
+    makedirs(dirname(path), exist_ok=True)
+    with open(_path(str(getuid()), ".lock"), "a") as lock:
+        try:
+            flock(lock, LOCK_EX | LOCK_NB)
+        except BlockingIOError:
+            return
+
+        samplers, peers = _Samplers(), _Peers()
+        samplers.get(args)
+
+        with suppress(FileNotFoundError):
+            unlink(path)
+        with socket(AF_UNIX, SOCK_STREAM) as server:
+            server.bind(path)
+            server.listen()
+            server.settimeout(_IDLE)
+            try:
+                while True:
+                    try:
+                        conn, _ = server.accept()
+                    except TimeoutError:
+                        break
+                    Thread(
+                        target=_respond,
+                        args=(conn, args, samplers, peers),
+                        daemon=True,
+                    ).start()
+            finally:
+                with suppress(FileNotFoundError):
+                    unlink(path)
+
+
+def main() -> None:
+    args = _parse_args(argv[1:])
+    if args.daemon:
+        _serve(args)
+    else:
+        tick = _sample(args)
+        line = _render(args, tick=tick)
+        stdout.write(line)
 
 
-main()
+if __name__ == "__main__":
+    main()